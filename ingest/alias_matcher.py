@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from typing import Any, Iterable, Iterator
+
+import ahocorasick
+
+
+class AliasMatcher:
+    def __init__(self, entries: Iterable[tuple[str, Any]]) -> None:
+        self._automaton = ahocorasick.Automaton()
+        for key, payload in entries:
+            # Several payloads can share a key (e.g. two agents with the same alias), so each key keeps a tuple.
+            self._automaton.add_word(key, (*self._automaton.get(key, ()), payload))
+        # pyahocorasick refuses to search an automaton without words; an empty matcher simply never matches.
+        if len(self._automaton):
+            self._automaton.make_automaton()
+
+    def iter_matches(self, text: str) -> Iterator[Any]:
+        if not len(self._automaton):
+            return
+        for _, payloads in self._automaton.iter(text):
+            yield from payloads
@@ -1,8 +1,13 @@
 from __future__ import annotations
 
 import argparse
-import json
-from typing import Any
+from typing import TYPE_CHECKING, Any
+
+from ingest.http_session import get_session
+from ingest.json_io import format_json, loads, write_json
+
+if TYPE_CHECKING:
+    import requests
 
 AGENTS_API_URL = "https://valorant-api.com/v1/agents?isPlayableCharacter=true"
 
@@ -49,12 +54,14 @@ def parse_agents_payload(payload: dict[str, Any]) -> dict[str, Any]:
     return {"agents": agents}
 
 
-def fetch_agents(api_url: str = AGENTS_API_URL, timeout: int = 20) -> dict[str, Any]:
-    import requests
-
-    response = requests.get(api_url, timeout=timeout)
+def fetch_agents(
+    api_url: str = AGENTS_API_URL,
+    timeout: int = 20,
+    session: requests.Session | None = None,
+) -> dict[str, Any]:
+    response = (session or get_session()).get(api_url, timeout=timeout)
     response.raise_for_status()
-    payload = response.json()
+    payload = loads(response.content)
     return parse_agents_payload(payload)
 
 
@@ -67,11 +74,10 @@ def main() -> None:
     agents = fetch_agents(api_url=args.api_url)
 
     if args.out:
-        with open(args.out, "w", encoding="utf-8") as file_obj:
-            json.dump(agents, file_obj, indent=2)
+        write_json(args.out, agents)
         print(f"Wrote agent metadata to {args.out}")
     else:
-        print(json.dumps(agents, indent=2))
+        print(format_json(agents))
 
 
 if __name__ == "__main__":
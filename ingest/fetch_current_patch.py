@@ -1,12 +1,16 @@
 from __future__ import annotations
 
 import argparse
-import json
 import re
-from typing import Any
+from typing import TYPE_CHECKING, Any
 from urllib.parse import urljoin
 
-from ingest.simple_html import parse_html
+from ingest.http_session import get_session
+from ingest.json_io import format_json, write_json
+from ingest.simple_html import iter_events
+
+if TYPE_CHECKING:
+    import requests
 
 PATCH_NOTES_TAG_URL = "https://playvalorant.com/en-us/news/tags/patch-notes/"
 BASE_URL = "https://playvalorant.com"
@@ -33,11 +37,10 @@ def format_patch_id(parts: tuple[int, int] | None) -> str | None:
 
 
 def extract_current_patch_link(html: str, base_url: str = BASE_URL) -> dict[str, Any]:
-    parsed = parse_html(html)
     candidates: list[dict[str, Any]] = []
     seen_urls: set[str] = set()
 
-    for index, anchor in enumerate(event for event in parsed.events if event.tag == "a"):
+    for index, anchor in enumerate(event for event in iter_events(html) if event.tag == "a"):
         href = anchor.attrs.get("href", "").strip()
         if not href:
             continue
@@ -91,10 +94,12 @@ def extract_current_patch_link(html: str, base_url: str = BASE_URL) -> dict[str,
     }
 
 
-def fetch_current_patch(tag_url: str = PATCH_NOTES_TAG_URL, timeout: int = 20) -> dict[str, Any]:
-    import requests
-
-    response = requests.get(tag_url, timeout=timeout)
+def fetch_current_patch(
+    tag_url: str = PATCH_NOTES_TAG_URL,
+    timeout: int = 20,
+    session: requests.Session | None = None,
+) -> dict[str, Any]:
+    response = (session or get_session()).get(tag_url, timeout=timeout)
     response.raise_for_status()
     return extract_current_patch_link(response.text, base_url=BASE_URL)
 
@@ -108,11 +113,10 @@ def main() -> None:
     patch_info = fetch_current_patch(args.tag_url)
 
     if args.out:
-        with open(args.out, "w", encoding="utf-8") as file_obj:
-            json.dump(patch_info, file_obj, indent=2)
+        write_json(args.out, patch_info)
         print(f"Wrote current patch metadata to {args.out}")
     else:
-        print(json.dumps(patch_info, indent=2))
+        print(format_json(patch_info))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import requests
+
+HTTP_CACHE_NAME = ".http_cache"
+AGENTS_CACHE_SECONDS = 3600
+
+_SESSION: requests.Session | None = None
+
+
+def _new_session() -> requests.Session:
+    from requests_cache import EXPIRE_IMMEDIATELY, CachedSession
+
+    # Cached pages are revalidated with ETag/Last-Modified on every run so a new patch is never missed;
+    # the agents list changes rarely enough to be reused without asking for an hour.
+    return CachedSession(
+        HTTP_CACHE_NAME,
+        backend="sqlite",
+        expire_after=EXPIRE_IMMEDIATELY,
+        urls_expire_after={"valorant-api.com": AGENTS_CACHE_SECONDS},
+    )
+
+
+def get_session() -> requests.Session:
+    global _SESSION
+    if _SESSION is None:
+        from requests.adapters import HTTPAdapter
+
+        session = _new_session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _SESSION = session
+    return _SESSION
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+import orjson
+
+
+def loads(data: bytes | str) -> Any:
+    return orjson.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+
+def read_json(path: str | Path) -> Any:
+    return loads(Path(path).read_bytes())
+
+
+def write_json(path: str | Path, obj: Any) -> None:
+    Path(path).write_bytes(dumps(obj))
+
+
+def format_json(obj: Any) -> str:
+    return dumps(obj).decode("utf-8")
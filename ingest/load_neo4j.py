@@ -1,18 +1,48 @@
 from __future__ import annotations
 
 import argparse
-import json
 import re
+import string
+from itertools import islice
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Iterator
 
-from neo4j import GraphDatabase, Session
+from neo4j import GraphDatabase, ManagedTransaction, Session
+
+from ingest.alias_matcher import AliasMatcher
+from ingest.json_io import format_json, read_json
 
 DEFAULT_SCHEMA_FILE = Path(__file__).resolve().parents[1] / "cypher" / "constraints_and_indexes.cypher"
+WRITE_BATCH_SIZE = 1000
+NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+_MATCH_KEEP = frozenset(string.ascii_lowercase + string.digits)
+_MATCH_TRANSLATION = str.maketrans({chr(code): " " for code in range(128) if chr(code) not in _MATCH_KEEP})
 
 
 def normalize_for_match(value: str) -> str:
-    return re.sub(r"[^a-z0-9]+", " ", value.lower()).strip()
+    lowered = value.lower()
+    if not lowered.isascii():
+        return NON_ALNUM_RE.sub(" ", lowered).strip()
+    return " ".join(lowered.translate(_MATCH_TRANSLATION).split())
+
+
+def _batched(rows: Iterable[dict[str, Any]], n: int = WRITE_BATCH_SIZE) -> Iterator[list[dict[str, Any]]]:
+    iterator = iter(rows)
+    while batch := list(islice(iterator, n)):
+        yield batch
+
+
+def _run_write_query(tx: ManagedTransaction, query: str, params: dict[str, Any]) -> None:
+    tx.run(query, **params).consume()
+
+
+def _run_read_query(tx: ManagedTransaction, query: str, params: dict[str, Any]) -> list[dict[str, Any]]:
+    return tx.run(query, **params).data()
+
+
+def _write_batched(session: Session, query: str, rows: Iterable[dict[str, Any]], **params: Any) -> None:
+    for batch in _batched(rows):
+        session.execute_write(_run_write_query, query, {**params, "rows": batch})
 
 
 def apply_schema(session: Session, schema_path: Path = DEFAULT_SCHEMA_FILE) -> None:
@@ -23,20 +53,21 @@ def apply_schema(session: Session, schema_path: Path = DEFAULT_SCHEMA_FILE) -> N
 
 
 def upsert_agents(session: Session, agents: list[dict[str, Any]]) -> None:
-    if not agents:
-        return
-    session.run(
+    _write_batched(
+        session,
         """
         UNWIND $rows AS row
         MERGE (a:Agent {uuid: row.uuid})
-        SET
-            a.name = row.name,
-            a.role = row.role,
-            a.icon_url = row.icon_url,
-            a.abilities = row.abilities,
-            a.aliases = row.aliases
+        ON CREATE SET a = row
+        ON MATCH SET a += {
+            name: row.name,
+            role: row.role,
+            icon_url: row.icon_url,
+            abilities: row.abilities,
+            aliases: row.aliases
+        }
         """,
-        rows=agents,
+        agents,
     )
 
 
@@ -73,56 +104,57 @@ def upsert_patch(session: Session, patch_doc: dict[str, Any]) -> tuple[int, int]
 
     clear_patch_subgraph(session, patch["id"])
 
-    section_count = 0
-    change_count = 0
-    for section in sections:
-        section_count += 1
-        session.run(
-            """
-            MATCH (p:Patch {id: $patch_id})
-            MERGE (s:Section {id: $id})
-            SET
-                s.name = $name,
-                s.order = $order,
-                s.patch_id = $patch_id
-            MERGE (p)-[:HAS_SECTION]->(s)
-            """,
-            patch_id=patch["id"],
-            id=section["id"],
-            name=section["name"],
-            order=section.get("order", section_count - 1),
+    section_rows: list[dict[str, Any]] = []
+    change_rows: list[dict[str, Any]] = []
+    for index, section in enumerate(sections):
+        section_rows.append(
+            {
+                "id": section["id"],
+                "name": section["name"],
+                "order": section.get("order", index),
+            }
         )
+        for change in section.get("changes", []):
+            change_rows.append({**change, "section_id": section["id"]})
 
-        changes = section.get("changes", [])
-        change_count += len(changes)
-        if not changes:
-            continue
-
-        session.run(
-            """
-            MATCH (s:Section {id: $section_id})
-            UNWIND $changes AS change
-            MERGE (c:Change {id: change.id})
-            SET
-                c.text = change.text,
-                c.section_name = change.section_name,
-                c.source_url = change.source_url,
-                c.order = change.order
-            MERGE (s)-[:HAS_CHANGE]->(c)
-            """,
-            section_id=section["id"],
-            changes=changes,
-        )
+    _write_batched(
+        session,
+        """
+        MATCH (p:Patch {id: $patch_id})
+        UNWIND $rows AS row
+        MERGE (s:Section {id: row.id})
+        SET
+            s.name = row.name,
+            s.order = row.order,
+            s.patch_id = $patch_id
+        MERGE (p)-[:HAS_SECTION]->(s)
+        """,
+        section_rows,
+        patch_id=patch["id"],
+    )
+    _write_batched(
+        session,
+        """
+        UNWIND $rows AS row
+        MATCH (s:Section {id: row.section_id})
+        MERGE (c:Change {id: row.id})
+        SET
+            c.text = row.text,
+            c.section_name = row.section_name,
+            c.source_url = row.source_url,
+            c.order = row.order
+        MERGE (s)-[:HAS_CHANGE]->(c)
+        """,
+        change_rows,
+    )
 
+    section_count = len(section_rows)
+    change_count = len(change_rows)
     return section_count, change_count
 
 
-def detect_agent_mentions(change_text: str, agents: list[dict[str, Any]]) -> list[str]:
-    normalized_text = f" {normalize_for_match(change_text)} "
-    if not normalized_text.strip():
-        return []
-
-    matched_uuids: list[str] = []
+def build_alias_needles(agents: list[dict[str, Any]]) -> list[tuple[str, str]]:
+    needles: list[tuple[str, str]] = []
     for agent in agents:
         uuid = agent.get("uuid")
         if not uuid:
@@ -133,53 +165,79 @@ def detect_agent_mentions(change_text: str, agents: list[dict[str, Any]]) -> lis
             alias_normalized = normalize_for_match(alias or "")
             if len(alias_normalized) < 3:
                 continue
-            if f" {alias_normalized} " in normalized_text:
-                matched_uuids.append(uuid)
-                break
+            needles.append((f" {alias_normalized} ", uuid))
+    return needles
 
-    return sorted(set(matched_uuids))
 
+def build_agent_matcher(agents: list[dict[str, Any]]) -> AliasMatcher:
+    return AliasMatcher(build_alias_needles(agents))
 
-def relink_patch_agent_mentions(session: Session, patch_id: str, agents: list[dict[str, Any]]) -> int:
+
+def detect_agent_mentions(
+    change_text: str,
+    agents: list[dict[str, Any]],
+    matcher: AliasMatcher | None = None,
+) -> list[str]:
+    normalized_text = f" {normalize_for_match(change_text)} "
+    if not normalized_text.strip():
+        return []
+
+    if matcher is None:
+        matcher = build_agent_matcher(agents)
+    return sorted(set(matcher.iter_matches(normalized_text)))
+
+
+def relink_patch_agent_mentions(
+    session: Session,
+    patch_id: str,
+    agents: list[dict[str, Any]],
+    changes: list[dict[str, Any]] | None = None,
+) -> int:
     if not agents:
         return 0
 
-    session.run(
+    session.execute_write(
+        _run_write_query,
         """
         MATCH (p:Patch {id: $patch_id})-[:HAS_SECTION]->(:Section)-[:HAS_CHANGE]->(c:Change)-[r:MENTIONS_AGENT]->(:Agent)
         DELETE r
         """,
-        patch_id=patch_id,
+        {"patch_id": patch_id},
     )
 
-    records = session.run(
-        """
-        MATCH (p:Patch {id: $patch_id})-[:HAS_SECTION]->(:Section)-[:HAS_CHANGE]->(c:Change)
-        RETURN c.id AS change_id, c.text AS text
-        """,
-        patch_id=patch_id,
-    )
+    # Callers that just wrote the patch pass its changes in, so the text is not read back from Neo4j.
+    if changes is None:
+        changes = session.execute_read(
+            _run_read_query,
+            """
+            MATCH (p:Patch {id: $patch_id})-[:HAS_SECTION]->(:Section)-[:HAS_CHANGE]->(c:Change)
+            RETURN c.id AS id, c.text AS text
+            """,
+            {"patch_id": patch_id},
+        )
 
+    matcher = build_agent_matcher(agents)
+    links: list[dict[str, Any]] = []
     links_created = 0
-    for record in records:
-        change_id = record["change_id"]
-        text = record["text"] or ""
-        mentioned_agent_uuids = detect_agent_mentions(text, agents)
+    for change in changes:
+        mentioned_agent_uuids = detect_agent_mentions(change["text"] or "", agents, matcher)
         if not mentioned_agent_uuids:
             continue
-
-        session.run(
-            """
-            MATCH (c:Change {id: $change_id})
-            UNWIND $agent_uuids AS uuid
-            MATCH (a:Agent {uuid: uuid})
-            MERGE (c)-[:MENTIONS_AGENT]->(a)
-            """,
-            change_id=change_id,
-            agent_uuids=mentioned_agent_uuids,
-        )
+        links.append({"change_id": change["id"], "agent_uuids": mentioned_agent_uuids})
         links_created += len(mentioned_agent_uuids)
 
+    _write_batched(
+        session,
+        """
+        UNWIND $rows AS row
+        MATCH (c:Change {id: row.change_id})
+        UNWIND row.agent_uuids AS uuid
+        MATCH (a:Agent {uuid: uuid})
+        MERGE (c)-[:MENTIONS_AGENT]->(a)
+        """,
+        links,
+    )
+
     return links_created
 
 
@@ -207,7 +265,8 @@ def load_to_neo4j(
 
             upsert_agents(session, agents)
             section_count, change_count = upsert_patch(session, patch_doc)
-            links_created = relink_patch_agent_mentions(session, patch_id=patch_id, agents=agents)
+            changes = [change for section in patch_doc.get("sections", []) for change in section.get("changes", [])]
+            links_created = relink_patch_agent_mentions(session, patch_id=patch_id, agents=agents, changes=changes)
 
         return {
             "sections": section_count,
@@ -232,13 +291,11 @@ def main() -> None:
     parser.add_argument("--wipe", action="store_true", help="Delete all nodes before loading.")
     args = parser.parse_args()
 
-    with open(args.patch_json, "r", encoding="utf-8") as file_obj:
-        patch_doc = json.load(file_obj)
+    patch_doc = read_json(args.patch_json)
 
     agents_doc = None
     if args.agents_json:
-        with open(args.agents_json, "r", encoding="utf-8") as file_obj:
-            agents_doc = json.load(file_obj)
+        agents_doc = read_json(args.agents_json)
 
     schema_path = None if args.skip_schema else Path(args.schema_file)
     stats = load_to_neo4j(
@@ -251,7 +308,7 @@ def main() -> None:
         apply_schema_file=schema_path,
         wipe=args.wipe,
     )
-    print(json.dumps(stats, indent=2))
+    print(format_json(stats))
 
 
 if __name__ == "__main__":
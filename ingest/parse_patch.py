@@ -1,13 +1,18 @@
 from __future__ import annotations
 
 import argparse
-import json
 import re
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
+from ingest.http_session import get_session
+from ingest.json_io import format_json, write_json
 from ingest.simple_html import ElementEvent, ParsedHTML, normalize_space, parse_html
 
+if TYPE_CHECKING:
+    import requests
+
 PATCH_ID_RE = re.compile(r"\b(\d{1,2})[.-](\d{1,2})\b")
+ISO_TIMESTAMP_RE = re.compile(r"\d{4}-\d{2}-\d{2}t\d{2}:\d{2}")
 NOISE_HEADINGS = {
     "share",
     "copy link",
@@ -34,11 +39,14 @@ def find_patch_id(*values: str) -> str | None:
 
 
 def scoped_events(parsed: ParsedHTML) -> list[ElementEvent]:
-    if any("article" in event.parents for event in parsed.events):
-        return [event for event in parsed.events if "article" in event.parents]
-    if any("main" in event.parents for event in parsed.events):
-        return [event for event in parsed.events if "main" in event.parents]
-    return parsed.events
+    article_events: list[ElementEvent] = []
+    main_events: list[ElementEvent] = []
+    for event in parsed.events:
+        if "article" in event.parent_set:
+            article_events.append(event)
+        elif "main" in event.parent_set:
+            main_events.append(event)
+    return article_events or main_events or parsed.events
 
 
 def extract_meta(parsed: ParsedHTML, key: str, value: str) -> str | None:
@@ -50,14 +58,13 @@ def extract_meta(parsed: ParsedHTML, key: str, value: str) -> str | None:
     return None
 
 
-def extract_title(parsed: ParsedHTML, events: list[ElementEvent]) -> str:
+def extract_title(parsed: ParsedHTML, first_h1: str | None) -> str:
     og_title = extract_meta(parsed, "property", "og:title")
     if og_title:
         return og_title
 
-    for event in events:
-        if event.tag == "h1" and event.text:
-            return event.text
+    if first_h1:
+        return first_h1
 
     if parsed.title:
         return parsed.title
@@ -65,20 +72,18 @@ def extract_title(parsed: ParsedHTML, events: list[ElementEvent]) -> str:
     return "Valorant Patch Notes"
 
 
-def extract_published_at(parsed: ParsedHTML, events: list[ElementEvent]) -> str | None:
+def extract_published_at(parsed: ParsedHTML, first_time: str | None) -> str | None:
     published = extract_meta(parsed, "property", "article:published_time")
     if published:
         return published
 
-    for event in events:
-        if event.tag != "time":
-            continue
-        if event.attrs.get("datetime"):
-            return normalize_space(event.attrs["datetime"])
-        if event.text:
-            return event.text
+    return first_time
 
-    return None
+
+def time_event_value(event: ElementEvent) -> str | None:
+    if event.attrs.get("datetime"):
+        return normalize_space(event.attrs["datetime"])
+    return event.text or None
 
 
 def should_keep_heading(text: str) -> bool:
@@ -89,20 +94,18 @@ def should_keep_heading(text: str) -> bool:
 
 
 def should_keep_change(text: str) -> bool:
-    normalized = text.lower().strip()
-    if not normalized:
+    stripped = text.strip()
+    # Reject on length first so long blobs are never lowercased.
+    if len(stripped) < 12 or len(stripped) > 500:
         return False
+    normalized = stripped.lower()
     if normalized in NOISE_CHANGES:
         return False
     if normalized.startswith("related articles"):
         return False
     if "game updates" in normalized and "patch notes" in normalized:
         return False
-    if re.search(r"\d{4}-\d{2}-\d{2}t\d{2}:\d{2}", normalized):
-        return False
-    if len(normalized) < 12:
-        return False
-    if len(normalized) > 500:
+    if ISO_TIMESTAMP_RE.search(normalized):
         return False
     return True
 
@@ -110,9 +113,6 @@ def should_keep_change(text: str) -> bool:
 def parse_patch_notes_html(html: str, source_url: str) -> dict[str, Any]:
     parsed = parse_html(html)
     events = scoped_events(parsed)
-    title = extract_title(parsed, events)
-    patch_id = find_patch_id(title, source_url) or "latest"
-    published_at = extract_published_at(parsed, events)
 
     raw_sections: list[dict[str, Any]] = [
         {
@@ -122,8 +122,22 @@ def parse_patch_notes_html(html: str, source_url: str) -> dict[str, Any]:
     ]
     current_section = raw_sections[0]
     seen_changes: set[tuple[str, str]] = set()
+    first_h1: str | None = None
+    first_time: str | None = None
+    sections_done = False
 
+    # Title, publish time and sections are all collected in a single pass over the events.
     for event in events:
+        if first_h1 is None and event.tag == "h1" and event.text:
+            first_h1 = event.text
+        elif first_time is None and event.tag == "time":
+            first_time = time_event_value(event)
+
+        if sections_done:
+            if first_h1 is not None and first_time is not None:
+                break
+            continue
+
         if event.tag not in {"h2", "h3", "li", "p"}:
             continue
 
@@ -134,13 +148,14 @@ def parse_patch_notes_html(html: str, source_url: str) -> dict[str, Any]:
         if event.tag in {"h2", "h3"}:
             heading_normalized = text.lower().strip()
             if heading_normalized == "related articles":
-                break
+                sections_done = True
+                continue
             if should_keep_heading(text):
                 current_section = {"name": text, "changes": []}
                 raw_sections.append(current_section)
             continue
 
-        if event.tag == "p" and "li" in event.parents:
+        if event.tag == "p" and "li" in event.parent_set:
             continue
 
         if should_keep_change(text):
@@ -149,6 +164,10 @@ def parse_patch_notes_html(html: str, source_url: str) -> dict[str, Any]:
                 current_section["changes"].append(text)
                 seen_changes.add(dedupe_key)
 
+    title = extract_title(parsed, first_h1)
+    patch_id = find_patch_id(title, source_url) or "latest"
+    published_at = extract_published_at(parsed, first_time)
+
     sections: list[dict[str, Any]] = []
     for section_index, raw_section in enumerate(raw_sections):
         if not raw_section["changes"]:
@@ -189,16 +208,14 @@ def parse_patch_notes_html(html: str, source_url: str) -> dict[str, Any]:
     }
 
 
-def fetch_patch_html(url: str, timeout: int = 20) -> str:
-    import requests
-
-    response = requests.get(url, timeout=timeout)
+def fetch_patch_html(url: str, timeout: int = 20, session: requests.Session | None = None) -> str:
+    response = (session or get_session()).get(url, timeout=timeout)
     response.raise_for_status()
     return response.text
 
 
-def parse_patch_notes(url: str) -> dict[str, Any]:
-    html = fetch_patch_html(url)
+def parse_patch_notes(url: str, session: requests.Session | None = None) -> dict[str, Any]:
+    html = fetch_patch_html(url, session=session)
     return parse_patch_notes_html(html, source_url=url)
 
 
@@ -225,11 +242,10 @@ def main() -> None:
         doc = parse_patch_notes_html(html, source_url=source_url)
 
     if args.out:
-        with open(args.out, "w", encoding="utf-8") as file_obj:
-            json.dump(doc, file_obj, indent=2)
+        write_json(args.out, doc)
         print(f"Wrote parsed patch document to {args.out}")
     else:
-        print(json.dumps(doc, indent=2))
+        print(format_json(doc))
 
 
 if __name__ == "__main__":
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 import argparse
-import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from ingest.fetch_agents import fetch_agents
 from ingest.fetch_current_patch import fetch_current_patch
+from ingest.http_session import get_session
+from ingest.json_io import format_json, write_json
 from ingest.load_neo4j import DEFAULT_SCHEMA_FILE, load_to_neo4j
 from ingest.parse_patch import parse_patch_notes
 
@@ -25,42 +27,47 @@ def main() -> None:
     output_dir = Path(args.output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    patch_meta = fetch_current_patch()
-    patch_doc = parse_patch_notes(patch_meta["url"])
+    session = get_session()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        # The agents fetch does not depend on the patch, so it runs while the patch pages download.
+        agents_future = None if args.skip_agents else executor.submit(fetch_agents, session=session)
+        patch_meta = fetch_current_patch(session=session)
+        patch_doc = parse_patch_notes(patch_meta["url"], session=session)
+        agents_doc = agents_future.result() if agents_future is not None else None
 
-    patch_id = patch_doc["patch"]["id"]
-    patch_meta_path = output_dir / "current_patch.json"
-    patch_doc_path = output_dir / f"patch_{patch_id}.json"
+        patch_id = patch_doc["patch"]["id"]
+        patch_meta_path = output_dir / "current_patch.json"
+        patch_doc_path = output_dir / f"patch_{patch_id}.json"
+        agents_path = output_dir / "agents.json"
 
-    with open(patch_meta_path, "w", encoding="utf-8") as file_obj:
-        json.dump(patch_meta, file_obj, indent=2)
-    with open(patch_doc_path, "w", encoding="utf-8") as file_obj:
-        json.dump(patch_doc, file_obj, indent=2)
+        # The JSON artifacts are diagnostic only, so they are written while Neo4j loads.
+        write_futures = [
+            executor.submit(write_json, patch_meta_path, patch_meta),
+            executor.submit(write_json, patch_doc_path, patch_doc),
+        ]
+        if agents_doc is not None:
+            write_futures.append(executor.submit(write_json, agents_path, agents_doc))
 
-    agents_doc = None
-    agents_path = output_dir / "agents.json"
-    if not args.skip_agents:
-        agents_doc = fetch_agents()
-        with open(agents_path, "w", encoding="utf-8") as file_obj:
-            json.dump(agents_doc, file_obj, indent=2)
+        stats = load_to_neo4j(
+            patch_doc=patch_doc,
+            agents_doc=agents_doc,
+            neo4j_uri=args.neo4j_uri,
+            neo4j_user=args.neo4j_user,
+            neo4j_password=args.neo4j_password,
+            neo4j_database=args.neo4j_database,
+            apply_schema_file=None if args.skip_schema else DEFAULT_SCHEMA_FILE,
+            wipe=args.wipe,
+        )
 
-    stats = load_to_neo4j(
-        patch_doc=patch_doc,
-        agents_doc=agents_doc,
-        neo4j_uri=args.neo4j_uri,
-        neo4j_user=args.neo4j_user,
-        neo4j_password=args.neo4j_password,
-        neo4j_database=args.neo4j_database,
-        apply_schema_file=None if args.skip_schema else DEFAULT_SCHEMA_FILE,
-        wipe=args.wipe,
-    )
+        for future in write_futures:
+            future.result()
 
     print("Pipeline complete.")
     print(f"Patch metadata: {patch_meta_path}")
     print(f"Patch document: {patch_doc_path}")
     if not args.skip_agents:
         print(f"Agents document: {agents_path}")
-    print(json.dumps(stats, indent=2))
+    print(format_json(stats))
 
 
 if __name__ == "__main__":
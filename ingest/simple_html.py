@@ -1,8 +1,12 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from html.parser import HTMLParser
-from typing import Any
+from functools import cached_property
+from typing import Any, Iterator
+
+from selectolax.lexbor import LexborHTMLParser
+
+INTERESTING_SELECTOR = "a, h1, h2, h3, p, li, time, title"
 
 
 def normalize_space(value: str) -> str:
@@ -16,6 +20,10 @@ class ElementEvent:
     text: str
     parents: tuple[str, ...]
 
+    @cached_property
+    def parent_set(self) -> frozenset[str]:
+        return frozenset(self.parents)
+
 
 @dataclass
 class ParsedHTML:
@@ -24,67 +32,43 @@ class ParsedHTML:
     events: list[ElementEvent]
 
 
-class _Collector(HTMLParser):
-    INTERESTING_TAGS = {"a", "h1", "h2", "h3", "p", "li", "time", "title"}
-
-    def __init__(self) -> None:
-        super().__init__(convert_charrefs=True)
-        self._stack: list[str] = []
-        self._capture_stack: list[dict[str, Any]] = []
-        self.events: list[ElementEvent] = []
-        self.metas: list[dict[str, str]] = []
-
-    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
-        attrs_dict = {key: (value or "") for key, value in attrs}
-        self._stack.append(tag)
-
-        if tag == "meta":
-            self.metas.append(attrs_dict)
-
-        if tag in self.INTERESTING_TAGS:
-            self._capture_stack.append(
-                {
-                    "tag": tag,
-                    "attrs": attrs_dict,
-                    "parents": tuple(self._stack[:-1]),
-                    "text_parts": [],
-                }
-            )
-
-    def handle_endtag(self, tag: str) -> None:
-        if self._capture_stack and self._capture_stack[-1]["tag"] == tag:
-            capture = self._capture_stack.pop()
-            text = normalize_space("".join(capture["text_parts"]))
-            self.events.append(
-                ElementEvent(
-                    tag=capture["tag"],
-                    attrs=capture["attrs"],
-                    text=text,
-                    parents=capture["parents"],
-                )
-            )
-
-        for index in range(len(self._stack) - 1, -1, -1):
-            if self._stack[index] == tag:
-                del self._stack[index]
-                break
-
-    def handle_data(self, data: str) -> None:
-        if not data or not self._capture_stack:
-            return
-        for capture in self._capture_stack:
-            capture["text_parts"].append(f" {data} ")
+def _node_parents(node: Any) -> tuple[str, ...]:
+    parents: list[str] = []
+    parent = node.parent
+    while parent is not None:
+        if parent.tag and parent.tag[0].isalpha():
+            parents.append(parent.tag)
+        parent = parent.parent
+    return tuple(reversed(parents))
+
+
+def _node_attrs(node: Any) -> dict[str, str]:
+    return {key: (value or "") for key, value in node.attributes.items()}
+
+
+def _iter_tree_events(tree: LexborHTMLParser) -> Iterator[ElementEvent]:
+    for node in tree.css(INTERESTING_SELECTOR):
+        yield ElementEvent(
+            tag=node.tag,
+            attrs=_node_attrs(node),
+            text=normalize_space(node.text(deep=True, separator=" ")),
+            parents=_node_parents(node),
+        )
+
+
+def iter_events(html: str) -> Iterator[ElementEvent]:
+    yield from _iter_tree_events(LexborHTMLParser(html))
 
 
 def parse_html(html: str) -> ParsedHTML:
-    collector = _Collector()
-    collector.feed(html)
-    collector.close()
+    tree = LexborHTMLParser(html)
+    metas = [_node_attrs(node) for node in tree.css("meta")]
+    events = list(_iter_tree_events(tree))
 
     title = None
-    for event in collector.events:
+    for event in events:
         if event.tag == "title" and event.text:
             title = event.text
             break
 
-    return ParsedHTML(title=title, metas=collector.metas, events=collector.events)
+    return ParsedHTML(title=title, metas=metas, events=events)
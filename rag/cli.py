@@ -1,13 +1,14 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 
 from rag.answer import format_answer
 from rag.retriever import GraphRetriever
 
 
-def run_single_query(retriever: GraphRetriever, query: str, k: int) -> str:
-    result = retriever.retrieve(query=query, k=k)
+async def run_single_query(retriever: GraphRetriever, query: str, k: int) -> str:
+    result = await retriever.retrieve(query=query, k=k)
     return format_answer(
         question=query,
         matched_agents=result["matched_agents"],
@@ -25,14 +26,19 @@ def main() -> None:
     parser.add_argument("--neo4j-database", default="neo4j", help="Neo4j database.")
     args = parser.parse_args()
 
-    with GraphRetriever(
+    # One loop for the whole session: the async driver's connections are bound to the loop that opened them,
+    # and input() stays outside the loop so Ctrl-C behaves as before.
+    loop = asyncio.new_event_loop()
+    retriever = GraphRetriever(
         neo4j_uri=args.neo4j_uri,
         neo4j_user=args.neo4j_user,
         neo4j_password=args.neo4j_password,
         neo4j_database=args.neo4j_database,
-    ) as retriever:
+    )
+    try:
+        loop.run_until_complete(retriever.ensure_indexes())
         if args.query:
-            print(run_single_query(retriever, query=args.query, k=args.top_k))
+            print(loop.run_until_complete(run_single_query(retriever, query=args.query, k=args.top_k)))
             return
 
         print("Interactive mode. Type 'exit' to quit.")
@@ -48,8 +54,11 @@ def main() -> None:
             if query.lower() in {"exit", "quit"}:
                 break
 
-            print(run_single_query(retriever, query=query, k=args.top_k))
+            print(loop.run_until_complete(run_single_query(retriever, query=query, k=args.top_k)))
             print()
+    finally:
+        loop.run_until_complete(retriever.aclose())
+        loop.close()
 
 
 if __name__ == "__main__":
@@ -1,13 +1,92 @@
 from __future__ import annotations
 
+import asyncio
+import copy
+import logging
+import re
+import threading
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Final
 
-from neo4j import GraphDatabase, Session
-from neo4j.exceptions import Neo4jError
+from cachetools import LRUCache, TTLCache
+from neo4j import AsyncGraphDatabase, AsyncResult, RoutingControl
 
+from ingest.alias_matcher import AliasMatcher
 
-@dataclass
+RESULT_CACHE_SIZE = 1024
+RESULT_CACHE_TTL_SECONDS = 300
+AGENT_MATCH_CACHE_SIZE = 4096
+MAX_MATCHED_AGENTS = 4
+LUCENE_SPECIAL_RE = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/])')
+LUCENE_OPERATORS = frozenset({"AND", "OR", "NOT"})
+
+logger = logging.getLogger(__name__)
+
+INDEX_STATUS_QUERY: Final[str] = """
+SHOW INDEXES
+YIELD name, type, state, populationPercent, labelsOrTypes, properties
+WHERE name IN ['change_text_ft']
+"""
+
+CREATE_INDEX_QUERIES: Final[dict[str, str]] = {
+    "change_text_ft": """
+CREATE FULLTEXT INDEX change_text_ft IF NOT EXISTS
+FOR (c:Change) ON EACH [c.text, c.section_name]
+""",
+}
+
+AWAIT_INDEXES_QUERY: Final[str] = """
+CALL db.awaitIndexes()
+"""
+
+AGENTS_QUERY: Final[str] = """
+MATCH (a:Agent)
+RETURN a.uuid AS uuid, a.name AS name, a.aliases AS aliases
+"""
+
+AGENT_CHANGES_QUERY: Final[str] = """
+MATCH (a:Agent)<-[:MENTIONS_AGENT]-(c:Change)<-[:HAS_CHANGE]-(s:Section)<-[:HAS_SECTION]-(p:Patch)
+WHERE a.uuid IN $agent_uuids
+WITH DISTINCT c, s, p
+RETURN
+    c.id AS change_id,
+    p.id AS patch_id,
+    s.name AS section_name,
+    c.text AS text,
+    c.source_url AS source_url,
+    [(c)-[:MENTIONS_AGENT]->(a2:Agent) | a2.name] AS agents,
+    10.0 AS score
+ORDER BY s.order ASC, c.order ASC
+LIMIT $k
+"""
+
+FULLTEXT_CHANGES_QUERY: Final[str] = """
+CALL {
+    CALL db.index.fulltext.queryNodes('change_text_ft', $search_text) YIELD node, score
+    WHERE node:Change
+    RETURN node, score
+    ORDER BY score DESC
+    LIMIT $k
+}
+MATCH (s:Section)-[:HAS_CHANGE]->(node)
+MATCH (p:Patch)-[:HAS_SECTION]->(s)
+RETURN
+    node.id AS change_id,
+    p.id AS patch_id,
+    s.name AS section_name,
+    node.text AS text,
+    node.source_url AS source_url,
+    [(node)-[:MENTIONS_AGENT]->(a:Agent) | a.name] AS agents,
+    score AS score
+ORDER BY score DESC
+LIMIT $k
+"""
+
+assert "$search_text" in FULLTEXT_CHANGES_QUERY and "$k" in FULLTEXT_CHANGES_QUERY
+assert "$agent_uuids" in AGENT_CHANGES_QUERY and "$k" in AGENT_CHANGES_QUERY
+
+
+@dataclass(slots=True, frozen=True)
 class RetrievedChange:
     change_id: str
     patch_id: str
@@ -18,6 +97,46 @@ class RetrievedChange:
     agents: list[str]
 
 
+def _rows_to_changes(rows: list[dict[str, Any]]) -> list[RetrievedChange]:
+    # The change queries return exactly the RetrievedChange fields, so rows unpack directly.
+    return [
+        RetrievedChange(
+            **{
+                **row,
+                "score": float(row["score"]),
+                "agents": [agent for agent in (row["agents"] or []) if agent],
+            }
+        )
+        for row in rows
+    ]
+
+
+def _lucene_escape(query: str) -> str:
+    terms = [
+        term.lower() if term in LUCENE_OPERATORS else LUCENE_SPECIAL_RE.sub(r"\\\1", term)
+        for term in query.split()
+    ]
+    if len(terms) < 2:
+        return "".join(terms)
+    phrase = " ".join(terms)
+    return f'"{phrase}" OR {phrase}'
+
+
+def build_alias_matcher(agents: list[dict[str, Any]]) -> AliasMatcher:
+    entries: list[tuple[str, tuple[str, str]]] = []
+    for agent in agents:
+        aliases = agent["aliases"] if agent.get("aliases") is not None else [agent["name"]]
+        for alias in aliases:
+            if alias:
+                entries.append((alias.lower(), (agent["uuid"], agent["name"])))
+    return AliasMatcher(entries)
+
+
+def match_agents(matcher: AliasMatcher, query: str) -> list[dict[str, str]]:
+    ranked = sorted(dict(matcher.iter_matches(query.lower())).items(), key=lambda item: len(item[1]), reverse=True)
+    return [{"uuid": uuid, "name": name} for uuid, name in ranked[:MAX_MATCHED_AGENTS]]
+
+
 class GraphRetriever:
     def __init__(
         self,
@@ -27,130 +146,119 @@ class GraphRetriever:
         neo4j_database: str = "neo4j",
     ) -> None:
         self.neo4j_database = neo4j_database
-        self.driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
+        self.driver = AsyncGraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
+        self._cache: TTLCache[tuple[str, int], dict[str, Any]] = TTLCache(
+            maxsize=RESULT_CACHE_SIZE,
+            ttl=RESULT_CACHE_TTL_SECONDS,
+        )
+        self._agent_match_cache: LRUCache[str, list[dict[str, str]]] = LRUCache(maxsize=AGENT_MATCH_CACHE_SIZE)
+        self._cache_lock = threading.RLock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._agent_matcher: AliasMatcher | None = None
+        self._indexes_ready = False
+        self._startup_lock = asyncio.Lock()
 
-    def close(self) -> None:
-        self.driver.close()
+    async def aclose(self) -> None:
+        await self.driver.close()
 
-    def __enter__(self) -> "GraphRetriever":
+    async def __aenter__(self) -> "GraphRetriever":
         return self
 
-    def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
-        self.close()
+    async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        await self.aclose()
+
+    def clear_cache(self) -> None:
+        with self._cache_lock:
+            self._cache.clear()
+            self._agent_match_cache.clear()
+
+    async def _read(self, query: str, params: dict[str, Any]) -> list[dict[str, Any]]:
+        return await self.driver.execute_query(
+            query,
+            params,
+            database_=self.neo4j_database,
+            routing_=RoutingControl.READ,
+            result_transformer_=AsyncResult.data,
+        )
+
+    async def ensure_indexes(self) -> None:
+        indexes = await self._read(INDEX_STATUS_QUERY, {})
+        missing = CREATE_INDEX_QUERIES.keys() - {index["name"] for index in indexes}
+        if missing:
+            for name in sorted(missing):
+                logger.warning("Index %s is missing; creating it", name)
+                await self.driver.execute_query(CREATE_INDEX_QUERIES[name], database_=self.neo4j_database)
+            await self.driver.execute_query(AWAIT_INDEXES_QUERY, database_=self.neo4j_database)
+            indexes = await self._read(INDEX_STATUS_QUERY, {})
+
+        for index in indexes:
+            logger.info(
+                "Index %s (%s): state=%s population=%s%% labels=%s properties=%s",
+                index["name"],
+                index["type"],
+                index["state"],
+                index["populationPercent"],
+                index["labelsOrTypes"],
+                index["properties"],
+            )
+        self._indexes_ready = True
+
+    async def refresh_agents(self) -> None:
+        agents = await self._read(AGENTS_QUERY, {})
+        self._agent_matcher = build_alias_matcher(agents)
+        self.clear_cache()
+
+    async def retrieve(self, query: str, k: int = 8) -> dict[str, Any]:
+        key = (query.strip().casefold(), k)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self.cache_hits += 1
+                return copy.deepcopy(cached)
+            self.cache_misses += 1
 
-    def retrieve(self, query: str, k: int = 8) -> dict[str, Any]:
-        with self.driver.session(database=self.neo4j_database) as session:
-            matched_agents = self._resolve_agents(session, query)
-            if matched_agents:
-                changes = self._query_by_agents(session, [agent["uuid"] for agent in matched_agents], k)
-            else:
-                changes = self._query_by_fulltext(session, query, k)
+        result = await self._retrieve_uncached(query, k)
+        with self._cache_lock:
+            self._cache[key] = result
+        return copy.deepcopy(result)
+
+    async def _retrieve_uncached(self, query: str, k: int) -> dict[str, Any]:
+        if not self._indexes_ready:
+            async with self._startup_lock:
+                if not self._indexes_ready:
+                    await self.ensure_indexes()
+        matched_agents = await self._resolve_agents(query)
+        if matched_agents:
+            changes = await self._query_by_agents([agent["uuid"] for agent in matched_agents], k)
+        else:
+            changes = await self._query_by_fulltext(query, k)
 
         return {
             "matched_agents": [agent["name"] for agent in matched_agents],
             "changes": changes,
         }
 
-    def _resolve_agents(self, session: Session, query: str) -> list[dict[str, str]]:
-        records = session.run(
-            """
-            MATCH (a:Agent)
-            WHERE any(alias IN coalesce(a.aliases, [a.name]) WHERE toLower($search_text) CONTAINS toLower(alias))
-            RETURN DISTINCT a.uuid AS uuid, a.name AS name
-            ORDER BY size(name) DESC
-            LIMIT 4
-            """,
-            search_text=query,
-        )
-        return [{"uuid": row["uuid"], "name": row["name"]} for row in records]
-
-    def _query_by_agents(self, session: Session, agent_uuids: list[str], k: int) -> list[RetrievedChange]:
-        records = session.run(
-            """
-            MATCH (a:Agent) WHERE a.uuid IN $agent_uuids
-            MATCH (a)<-[:MENTIONS_AGENT]-(c:Change)
-            WITH DISTINCT c
-            MATCH (s:Section)-[:HAS_CHANGE]->(c)
-            MATCH (p:Patch)-[:HAS_SECTION]->(s)
-            OPTIONAL MATCH (c)-[:MENTIONS_AGENT]->(a2:Agent)
-            WITH
-                c,
-                p,
-                s,
-                collect(DISTINCT a2.name) AS agents,
-                s.order AS section_order,
-                c.order AS change_order
-            RETURN
-                c.id AS change_id,
-                p.id AS patch_id,
-                s.name AS section_name,
-                c.text AS text,
-                c.source_url AS source_url,
-                agents,
-                10.0 AS score
-            ORDER BY section_order ASC, change_order ASC
-            LIMIT $k
-            """,
-            agent_uuids=agent_uuids,
-            k=k,
-        )
-        return [self._record_to_change(row) for row in records]
-
-    def _query_by_fulltext(self, session: Session, query: str, k: int) -> list[RetrievedChange]:
-        try:
-            records = session.run(
-                """
-                CALL db.index.fulltext.queryNodes('change_text_ft', $search_text) YIELD node, score
-                WITH node, score
-                WHERE node:Change
-                MATCH (s:Section)-[:HAS_CHANGE]->(node)
-                MATCH (p:Patch)-[:HAS_SECTION]->(s)
-                OPTIONAL MATCH (node)-[:MENTIONS_AGENT]->(a:Agent)
-                RETURN
-                    node.id AS change_id,
-                    p.id AS patch_id,
-                    s.name AS section_name,
-                    node.text AS text,
-                    node.source_url AS source_url,
-                    collect(DISTINCT a.name) AS agents,
-                    score AS score
-                ORDER BY score DESC
-                LIMIT $k
-                """,
-                search_text=query,
-                k=k,
-            )
-            return [self._record_to_change(row) for row in records]
-        except Neo4jError:
-            fallback_records = session.run(
-                """
-                MATCH (p:Patch)-[:HAS_SECTION]->(s:Section)-[:HAS_CHANGE]->(c:Change)
-                WHERE toLower(c.text) CONTAINS toLower($search_text) OR toLower(s.name) CONTAINS toLower($search_text)
-                OPTIONAL MATCH (c)-[:MENTIONS_AGENT]->(a:Agent)
-                RETURN
-                    c.id AS change_id,
-                    p.id AS patch_id,
-                    s.name AS section_name,
-                    c.text AS text,
-                    c.source_url AS source_url,
-                    collect(DISTINCT a.name) AS agents,
-                    1.0 AS score
-                ORDER BY s.order ASC, c.order ASC
-                LIMIT $k
-                """,
-                search_text=query,
-                k=k,
-            )
-            return [self._record_to_change(row) for row in fallback_records]
-
-    @staticmethod
-    def _record_to_change(record: Any) -> RetrievedChange:
-        return RetrievedChange(
-            change_id=record["change_id"],
-            patch_id=record["patch_id"],
-            section_name=record["section_name"],
-            text=record["text"],
-            source_url=record["source_url"],
-            score=float(record["score"]),
-            agents=[agent for agent in (record["agents"] or []) if agent],
-        )
+    async def _resolve_agents(self, query: str) -> list[dict[str, str]]:
+        if self._agent_matcher is None:
+            async with self._startup_lock:
+                if self._agent_matcher is None:
+                    await self.refresh_agents()
+
+        key = query.lower()
+        with self._cache_lock:
+            matched = self._agent_match_cache.get(key)
+            if matched is None:
+                matched = self._agent_match_cache[key] = match_agents(self._agent_matcher, key)
+        return matched
+
+    async def _query_by_agents(self, agent_uuids: list[str], k: int) -> list[RetrievedChange]:
+        records = await self._read(AGENT_CHANGES_QUERY, {"agent_uuids": agent_uuids, "k": k})
+        return _rows_to_changes(records)
+
+    async def _query_by_fulltext(self, query: str, k: int) -> list[RetrievedChange]:
+        search_text = _lucene_escape(query)
+        if not search_text:
+            return []
+        records = await self._read(FULLTEXT_CHANGES_QUERY, {"search_text": search_text, "k": k})
+        return _rows_to_changes(records)
@@ -1,38 +1,133 @@
 from __future__ import annotations
 
-import json
 import unittest
+from functools import cache
 from pathlib import Path
+from typing import Any, Iterator
 
 from ingest.fetch_agents import parse_agents_payload
 from ingest.fetch_current_patch import extract_current_patch_link
+from ingest.load_neo4j import NON_ALNUM_RE, build_agent_matcher, detect_agent_mentions, normalize_for_match
 from ingest.parse_patch import parse_patch_notes_html
 
 FIXTURE_DIR = Path(__file__).parent / "fixtures"
+ARTICLE_URL = "https://playvalorant.com/en-us/news/game-updates/valorant-patch-notes-12-02/"
+
+
+@cache
+def load_fixture(name: str) -> str:
+    return (FIXTURE_DIR / name).read_bytes().decode("utf-8")
+
+
+@cache
+def load_current_patch() -> dict[str, Any]:
+    return extract_current_patch_link(load_fixture("sample_patch_listing.html"))
+
+
+@cache
+def load_patch_doc() -> dict[str, Any]:
+    return parse_patch_notes_html(html=load_fixture("sample_patch_article.html"), source_url=ARTICLE_URL)
+
+
+def _walk_strings(obj: Any) -> Iterator[str]:
+    if isinstance(obj, str):
+        yield obj
+    elif isinstance(obj, dict):
+        for value in obj.values():
+            yield from _walk_strings(value)
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            yield from _walk_strings(item)
 
 
 class IngestTests(unittest.TestCase):
+    current_patch: dict[str, Any]
+    patch_doc: dict[str, Any]
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.current_patch = load_current_patch()
+        cls.patch_doc = load_patch_doc()
+
     def test_extract_current_patch_link(self) -> None:
-        html = (FIXTURE_DIR / "sample_patch_listing.html").read_text(encoding="utf-8")
-        patch = extract_current_patch_link(html)
+        patch = self.current_patch
 
         self.assertEqual(patch["patch_id"], "12.02")
         self.assertIn("12-02", patch["url"])
 
     def test_parse_patch_notes_html(self) -> None:
-        html = (FIXTURE_DIR / "sample_patch_article.html").read_text(encoding="utf-8")
-        doc = parse_patch_notes_html(
-            html=html,
-            source_url="https://playvalorant.com/en-us/news/game-updates/valorant-patch-notes-12-02/",
-        )
+        doc = self.patch_doc
 
         self.assertEqual(doc["patch"]["id"], "12.02")
         self.assertEqual(doc["patch"]["published_at"], "2026-02-03")
         self.assertGreaterEqual(len(doc["sections"]), 2)
 
-        all_change_text = json.dumps(doc["sections"])
-        self.assertIn("Reyna", all_change_text)
-        self.assertIn("Harbor", all_change_text)
+        self.assertTrue(any("Reyna" in text for text in _walk_strings(doc["sections"])))
+        self.assertTrue(any("Harbor" in text for text in _walk_strings(doc["sections"])))
+
+    def test_parse_patch_notes_html_nested_lists_and_unclosed_paragraph(self) -> None:
+        html = """
+        <html><body><article>
+          <h1>VALORANT Patch Notes 12.03</h1>
+          <h2>Agent Updates</h2>
+          <ul>
+            <li>Jett's Tailwind dash window reduced.<ul><li>Dash now lasts 7.5 seconds.</li></ul></li>
+            <li>Sova's Recon Bolt reveal count lowered.</li>
+          </ul>
+          <p>Unclosed note about Omen's Paranoia speed.
+          <h2>Maps</h2>
+          <p>Lotus rotation door timing adjusted.</p>
+        </article></body></html>
+        """
+        doc = parse_patch_notes_html(html=html, source_url=ARTICLE_URL.replace("12-02", "12-03"))
+
+        sections = [(section["name"], [change["text"] for change in section["changes"]]) for section in doc["sections"]]
+        self.assertEqual(
+            sections,
+            [
+                (
+                    "Agent Updates",
+                    [
+                        "Jett's Tailwind dash window reduced. Dash now lasts 7.5 seconds.",
+                        "Dash now lasts 7.5 seconds.",
+                        "Sova's Recon Bolt reveal count lowered.",
+                        "Unclosed note about Omen's Paranoia speed.",
+                    ],
+                ),
+                ("Maps", ["Lotus rotation door timing adjusted."]),
+            ],
+        )
+
+    def test_normalize_for_match(self) -> None:
+        self.assertEqual(normalize_for_match("Reyna's  LEER -- nerfed!"), "reyna s leer nerfed")
+        self.assertEqual(normalize_for_match("  ...  "), "")
+        # Non-ASCII input takes the regex path, which drops characters outside a-z0-9.
+        self.assertEqual(normalize_for_match("Café KAY/O"), "caf kay o")
+
+        for value in ["KAY/O's Flash/Drive", "  Jett\t\nDash  ", "a--b__c", ""]:
+            with self.subTest(value=value):
+                self.assertEqual(normalize_for_match(value), NON_ALNUM_RE.sub(" ", value.lower()).strip())
+
+    def test_detect_agent_mentions(self) -> None:
+        agents = [
+            {"uuid": "u-kayo", "name": "KAY/O", "aliases": ["KAY/O", "KAYO"]},
+            {"uuid": "u-jett", "name": "Jett", "aliases": ["Jett", "Tailwind"]},
+            {"uuid": "u-yoru", "name": "Yoru", "aliases": ["Yo"]},
+            {"uuid": "u-sova", "name": "Sova", "aliases": None},
+        ]
+        matcher = build_agent_matcher(agents)
+
+        self.assertEqual(
+            detect_agent_mentions("KAY/O and jett's Tailwind changes", agents, matcher),
+            ["u-jett", "u-kayo"],
+        )
+        self.assertEqual(detect_agent_mentions("SOVA recon", agents, matcher), ["u-sova"])
+        # Aliases only match whole words, and aliases shorter than three characters are ignored.
+        self.assertEqual(detect_agent_mentions("Jetty tailwinds", agents, matcher), [])
+        self.assertEqual(detect_agent_mentions("Yo yo", agents, matcher), [])
+        self.assertEqual(detect_agent_mentions("", agents, matcher), [])
+        self.assertEqual(detect_agent_mentions("Jett", agents), ["u-jett"])
+        self.assertEqual(detect_agent_mentions("Jett", [], build_agent_matcher([])), [])
 
     def test_parse_agents_payload(self) -> None:
         payload = {
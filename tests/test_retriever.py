@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import unittest
+
+from rag.retriever import _lucene_escape, build_alias_matcher, match_agents
+
+AGENTS = [
+    {"uuid": "u-kayo", "name": "KAY/O", "aliases": ["KAY/O", "kayo"]},
+    {"uuid": "u-jett", "name": "Jett", "aliases": None},
+    {"uuid": "u-harbor", "name": "Harbor", "aliases": ["Harbor", "High Tide"]},
+    {"uuid": "u-sova", "name": "Sova", "aliases": []},
+    {"uuid": "u-brimstone", "name": "Brimstone", "aliases": ["Brimstone"]},
+    {"uuid": "u-astra", "name": "Astra", "aliases": ["Astra"]},
+]
+
+
+class RetrieverTests(unittest.TestCase):
+    def test_lucene_escape(self) -> None:
+        self.assertEqual(_lucene_escape("jett"), "jett")
+        self.assertEqual(_lucene_escape("  jett   nerf "), '"jett nerf" OR jett nerf')
+        self.assertEqual(
+            _lucene_escape("phoenix: buff (ult)?"),
+            '"phoenix\\: buff \\(ult\\)\\?" OR phoenix\\: buff \\(ult\\)\\?',
+        )
+        self.assertEqual(_lucene_escape("C++ -1 ^2 !x"), '"C\\+\\+ \\-1 \\^2 \\!x" OR C\\+\\+ \\-1 \\^2 \\!x')
+        self.assertEqual(_lucene_escape('a\\b "x"'), '"a\\\\b \\"x\\"" OR a\\\\b \\"x\\"')
+        escaped = "\\[1 TO 5\\] \\{a\\} \\~b \\*c \\/d \\&\\&e \\|\\|f"
+        self.assertEqual(_lucene_escape("[1 TO 5] {a} ~b *c /d &&e ||f"), f'"{escaped}" OR {escaped}')
+
+    def test_lucene_escape_operators_and_blank_queries(self) -> None:
+        self.assertEqual(_lucene_escape("AND"), "and")
+        self.assertEqual(_lucene_escape("jett OR NOT sova"), '"jett or not sova" OR jett or not sova')
+        # Only bare upper-case operators change; mixed case and substrings are left alone.
+        self.assertEqual(_lucene_escape("Or ANDROID"), '"Or ANDROID" OR Or ANDROID')
+        self.assertEqual(_lucene_escape(""), "")
+        self.assertEqual(_lucene_escape(" \t\n "), "")
+
+    def test_match_agents(self) -> None:
+        matcher = build_alias_matcher(AGENTS)
+
+        self.assertEqual(match_agents(matcher, "What changed for Jett?"), [{"uuid": "u-jett", "name": "Jett"}])
+        self.assertEqual(
+            match_agents(matcher, "kayo HIGH TIDE"),
+            [{"uuid": "u-harbor", "name": "Harbor"}, {"uuid": "u-kayo", "name": "KAY/O"}],
+        )
+        # An explicit empty alias list means the agent is never matched, not even by name.
+        self.assertEqual(match_agents(matcher, "sova"), [])
+        self.assertEqual(match_agents(matcher, "nothing here"), [])
+
+    def test_match_agents_keeps_longest_names(self) -> None:
+        matcher = build_alias_matcher(AGENTS)
+        matched = match_agents(matcher, "jett kay/o harbor brimstone astra jett")
+
+        # Ties on name length keep the order the agents appear in the query.
+        self.assertEqual([agent["name"] for agent in matched], ["Brimstone", "Harbor", "KAY/O", "Astra"])
+
+    def test_match_agents_without_agents(self) -> None:
+        self.assertEqual(match_agents(build_alias_matcher([]), "jett"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()